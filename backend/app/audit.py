@@ -2,38 +2,73 @@
 Audit logging for Fast VM
 """
 import json
+import asyncio
 import logging
+import threading
+from collections import deque
 from datetime import datetime
 from .database import get_connection
 
 logger = logging.getLogger("fast_vm.audit")
 
+# Audit entries are buffered in memory and written in batches by audit_flusher()
+AUDIT_FLUSH_INTERVAL = 0.1  # seconds
+AUDIT_QUEUE_MAX = 10_000
+
+_pending: deque = deque()
+_flush_lock = threading.Lock()
+
 
 def log_action(username: str, action: str, resource_type: str = None,
                resource_id: str = None, details: dict = None, ip: str = None):
-    """Log an audit action to the database"""
-    try:
-        with get_connection() as conn:
-            conn.execute(
-                "INSERT INTO audit_log (timestamp, username, action, resource_type, resource_id, details, ip_address) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (
-                    datetime.utcnow().isoformat(),
-                    username,
-                    action,
-                    resource_type,
-                    resource_id,
-                    json.dumps(details) if details else None,
-                    ip
+    """Queue an audit action for the next batched database write"""
+    _pending.append((
+        datetime.utcnow().isoformat(),
+        username,
+        action,
+        resource_type,
+        resource_id,
+        json.dumps(details) if details else None,
+        ip
+    ))
+    logger.info(f"AUDIT: {username} {action} {resource_type or ''} {resource_id or ''}")
+    if len(_pending) >= AUDIT_QUEUE_MAX:
+        # Backpressure: write inline rather than drop audit entries
+        flush_audit_log()
+
+
+def flush_audit_log():
+    """Write all pending audit actions to the database in one transaction"""
+    with _flush_lock:
+        rows = []
+        while _pending:
+            rows.append(_pending.popleft())
+        if not rows:
+            return
+        try:
+            with get_connection() as conn:
+                conn.executemany(
+                    "INSERT INTO audit_log (timestamp, username, action, resource_type, resource_id, details, ip_address) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
                 )
-            )
-        logger.info(f"AUDIT: {username} {action} {resource_type or ''} {resource_id or ''}")
-    except Exception as e:
-        logger.error(f"Error logging audit action: {e}")
+        except Exception as e:
+            logger.error(f"Error logging audit actions: {e}")
+
+
+async def audit_flusher():
+    """Background task: flush buffered audit actions every AUDIT_FLUSH_INTERVAL seconds"""
+    loop = asyncio.get_event_loop()
+    while True:
+        await asyncio.sleep(AUDIT_FLUSH_INTERVAL)
+        if _pending:
+            await loop.run_in_executor(None, flush_audit_log)
 
 
 def get_audit_logs(limit: int = 100, offset: int = 0,
                    username: str = None, action: str = None):
     """Query audit logs with optional filters"""
+    # Make sure queued actions are visible to the query
+    flush_audit_log()
     try:
         with get_connection() as conn:
             query = "SELECT * FROM audit_log WHERE 1=1"
@@ -4,8 +4,9 @@ Handles JWT token creation/verification and user management
 Uses SQLite for user persistence (via database module)
 """
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import os
+import time
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -31,6 +32,10 @@ if SECRET_KEY == _default_secret:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
+# How long a verified token -> user resolution may be reused
+TOKEN_CACHE_TTL = 30  # seconds
+TOKEN_CACHE_MAX = 2048
+
 # Security scheme
 security = HTTPBearer()
 
@@ -84,6 +89,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+# token -> (valid_until monotonic timestamp, resolved user)
+_token_cache: Dict[str, Tuple[float, "UserInfo"]] = {}
+
+
+def clear_token_cache():
+    """Drop all cached token resolutions (after user changes)"""
+    _token_cache.clear()
+
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify a JWT token and return its payload"""
     try:
@@ -121,13 +135,17 @@ def create_user(username: str, password: str, is_admin: bool = False) -> User:
 
 def delete_user(username: str) -> bool:
     """Delete a user"""
-    return db_delete_user(username)
+    deleted = db_delete_user(username)
+    clear_token_cache()
+    return deleted
 
 
 def change_password(username: str, new_password: str) -> bool:
     """Change a user's password"""
     hashed = hash_password(new_password)
-    return db_change_password(username, hashed)
+    changed = db_change_password(username, hashed)
+    clear_token_cache()
+    return changed
 
 
 def list_users() -> list:
@@ -148,10 +166,21 @@ def create_default_user():
         logger.info("Created default admin user (username: admin, password: admin)")
 
 
-# FastAPI dependency for getting current user
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInfo:
-    """Dependency to get the current authenticated user from JWT token"""
-    token = credentials.credentials
+def _decode(token: str) -> UserInfo:
+    """Resolve a bearer token to its user (JWT verify + DB lookup)
+
+    Successful resolutions are memoized for TOKEN_CACHE_TTL seconds, capped
+    at the token's own expiry, so repeated requests with the same token skip
+    the signature check and the user query.
+
+    Raises:
+        HTTPException: 401 if the token is invalid or the user is gone
+    """
+    now = time.monotonic()
+    entry = _token_cache.get(token)
+    if entry is not None and now < entry[0]:
+        return entry[1]
+
     payload = verify_token(token)
 
     if payload is None:
@@ -177,4 +206,21 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return UserInfo(username=user.username, is_admin=user.is_admin)
+    info = UserInfo(username=user.username, is_admin=user.is_admin)
+
+    valid_for = TOKEN_CACHE_TTL
+    exp = payload.get("exp")
+    if exp is not None:
+        valid_for = min(valid_for, exp - time.time())
+    if valid_for > 0:
+        if len(_token_cache) >= TOKEN_CACHE_MAX:
+            _token_cache.clear()
+        _token_cache[token] = (now + valid_for, info)
+
+    return info
+
+
+# FastAPI dependency for getting current user
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInfo:
+    """Dependency to get the current authenticated user from JWT token"""
+    return _decode(credentials.credentials)
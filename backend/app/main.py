@@ -25,6 +25,7 @@ logger = logging.getLogger("fast_vm.main")
 from .deps import vm_manager, ws_clients
 from .database import init_db, cleanup_old_metrics, cleanup_old_audit_logs
 from .auth import create_default_user
+from .audit import audit_flusher, flush_audit_log
 
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -80,8 +81,7 @@ async def periodic_cleanup():
         await asyncio.sleep(300)
         try:
             vm_manager.vnc_proxy_manager.cleanup_orphaned_proxies()
-            for vm_id in list(vm_manager.vms.keys()):
-                vm_manager._update_vm_status(vm_id)
+            vm_manager.refresh_vm_statuses()
             cleanup_old_metrics(24)
             cleanup_old_audit_logs(90)
         except Exception as e:
@@ -102,7 +102,25 @@ async def lifespan(app_instance: FastAPI):
     from .routers.metrics import collect_metrics_task
     asyncio.create_task(collect_metrics_task())
     asyncio.create_task(periodic_cleanup())
+    asyncio.create_task(audit_flusher())
+
+    # QEMU exits are signalled through the VM manager's pidfd epoll. The
+    # reader only drains the pidfds; saving vms.json (fsync + rename) runs
+    # in the thread pool so it never blocks the event loop
+    loop = asyncio.get_running_loop()
+
+    def _on_vm_exit():
+        exited = vm_manager.drain_vm_exits()
+        if exited:
+            loop.run_in_executor(None, vm_manager.mark_vms_exited, exited)
+
+    exit_fd = vm_manager.exit_events_fd
+    if exit_fd is not None:
+        loop.add_reader(exit_fd, _on_vm_exit)
     yield
+    if exit_fd is not None:
+        loop.remove_reader(exit_fd)
+    flush_audit_log()
     vm_manager.vnc_proxy_manager.cleanup_all()
     vm_manager.spice_proxy_manager.cleanup_all()
     for ws in list(ws_clients):
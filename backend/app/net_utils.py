@@ -0,0 +1,29 @@
+"""
+Network helpers shared by the VM manager and the websockify proxy managers
+"""
+import socket
+
+
+def is_port_in_use(port: int, host: str = "127.0.0.1") -> bool:
+    """Check if a TCP port is taken by trying to bind it
+
+    A bind probe is a single kernel lookup: it neither connects to whatever
+    is listening (websockify/QEMU would log a spurious client) nor walks the
+    connection table like psutil.net_connections(), which also needs
+    elevated permissions. SO_REUSEADDR keeps TIME_WAIT leftovers from
+    counting as in use.
+
+    Args:
+        port: Port number to check
+        host: Address to probe (listeners on 0.0.0.0 conflict as well)
+
+    Returns:
+        True if something is bound to the port
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind((host, port))
+        except OSError:
+            return True
+    return False
@@ -0,0 +1,233 @@
+"""
+Process helpers shared by the VM manager and the websockify proxy managers
+"""
+import os
+import select
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+# How long a liveness answer may be reused before /proc is consulted again
+PROCESS_LIVENESS_TTL = 0.2  # seconds
+_LIVENESS_CACHE_MAX = 1024
+
+# How long a freshly spawned websockify must survive to count as started
+PROXY_STARTUP_TIMEOUT = 0.5  # seconds
+
+_HAVE_PROCFS = os.path.exists("/proc/self/stat")
+
+
+def is_process_running(pid: int) -> bool:
+    """Check if a process is running (zombies count as dead)
+
+    A kill(pid, 0) probe answers "exists?" in one syscall; /proc/<pid>/stat
+    is only read to rule out zombies.
+    """
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    if not _HAVE_PROCFS:
+        return True
+    try:
+        # Raw fd + single read: no buffered file object for a ~300 byte file
+        fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY | os.O_CLOEXEC)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True
+    try:
+        stat = os.read(fd, 4096)
+    except OSError:
+        return False  # process went away between open and read (ESRCH)
+    finally:
+        os.close(fd)
+    # State is the first field after the parenthesised command name
+    end = stat.rfind(b')')
+    return stat[end + 2:end + 3] not in (b'Z', b'X')
+
+
+class LivenessCache:
+    """Short-lived cache of is_process_running() results keyed by PID
+
+    Collapses bursts of status queries (e.g. dashboard polling) into a
+    single /proc lookup per process every PROCESS_LIVENESS_TTL seconds.
+    """
+
+    def __init__(self, ttl: float = PROCESS_LIVENESS_TTL):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[float, bool]] = {}
+
+    def is_running(self, pid: int) -> bool:
+        """Return the cached liveness of pid, refreshing it once the TTL expires"""
+        now = time.monotonic()
+        entry = self._entries.get(pid)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+        running = is_process_running(pid)
+        if len(self._entries) >= _LIVENESS_CACHE_MAX:
+            self._entries.clear()
+        self._entries[pid] = (now, running)
+        return running
+
+    def invalidate(self, pid: int):
+        """Forget the cached answer for pid (after signalling it)"""
+        self._entries.pop(pid, None)
+
+
+class PidWatcher:
+    """Event-driven exit tracking for long-lived processes (e.g. QEMU)
+
+    Each watched process gets a pidfd registered on one epoll instance. A
+    pidfd becomes readable when its process exits, so a single non-blocking
+    epoll poll tells which watched processes are gone without reading /proc.
+    On systems without pidfds or epoll, watch() returns False and callers
+    keep using is_process_running().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, int]] = {}  # key -> (pid, pidfd)
+        self._keys: Dict[int, str] = {}  # pidfd -> key
+        try:
+            self._epoll = select.epoll()
+        except AttributeError:
+            self._epoll = None
+
+    def watch(self, key: str, pid: int) -> bool:
+        """Start tracking pid under key, replacing any previous entry
+
+        Returns:
+            True if the process is now being watched
+        """
+        if self._epoll is None:
+            return False
+        try:
+            fd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            return False
+        with self._lock:
+            self._remove(key)
+            self._epoll.register(fd, select.EPOLLIN)
+            self._entries[key] = (pid, fd)
+            self._keys[fd] = key
+        return True
+
+    def unwatch(self, key: str):
+        """Stop tracking key"""
+        with self._lock:
+            self._remove(key)
+
+    def fileno(self) -> Optional[int]:
+        """The epoll fd, readable whenever a watched process has exited"""
+        return self._epoll.fileno() if self._epoll is not None else None
+
+    def drain(self) -> List[Tuple[str, int]]:
+        """Stop tracking every watched process that has exited
+
+        Returns:
+            (key, pid) for each exited process
+        """
+        if self._epoll is None:
+            return []
+        exited = []
+        with self._lock:
+            for fd, _ in self._epoll.poll(0):
+                key = self._keys.get(fd)
+                if key is not None:
+                    exited.append((key, self._entries[key][0]))
+                    self._remove(key)
+        return exited
+
+    def is_running(self, key: str, pid: int) -> Optional[bool]:
+        """Check a watched process
+
+        Returns:
+            True if pid is watched under key and has not exited, None if it
+            is not watched (or has exited) and must be checked another way
+        """
+        if self._epoll is None:
+            return None
+        self.drain()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != pid:
+            return None
+        return True
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        fd = entry[1]
+        del self._keys[fd]
+        self._epoll.unregister(fd)
+        os.close(fd)
+
+
+def wait_pid(pid: int, timeout: float) -> bool:
+    """Wait for a process to exit
+
+    Uses a pidfd (Linux >= 5.3) so the kernel wakes us up when the process
+    exits instead of polling /proc. Falls back to psutil where pidfds are
+    not available.
+
+    Args:
+        pid: Process ID to wait for
+        timeout: Maximum time to wait in seconds
+
+    Returns:
+        True if the process exited within the timeout
+    """
+    try:
+        fd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return True
+    except (AttributeError, OSError):
+        try:
+            psutil.Process(pid).wait(timeout=timeout)
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.TimeoutExpired:
+            return False
+        return True
+
+    try:
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        exited = bool(poller.poll(int(timeout * 1000)))
+    finally:
+        os.close(fd)
+
+    if exited:
+        # Reap it if it is our own child so it doesn't linger as a zombie
+        try:
+            os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+    return exited
+
+
+def terminate_pid(pid: int, timeout: float):
+    """Send SIGTERM to a process, escalating to SIGKILL if it outlives the timeout
+
+    Args:
+        pid: Process ID to stop
+        timeout: Seconds to wait for a graceful exit before killing
+    """
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+
+    if not wait_pid(pid, timeout):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
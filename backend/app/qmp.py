@@ -0,0 +1,107 @@
+"""QEMU Machine Protocol (QMP) helper for controlling running VMs."""
+import json
+import socket
+import logging
+from typing import Optional
+
+logger = logging.getLogger("fast_vm.qmp")
+
+
+class QMPError(Exception):
+    """Error communicating with the QEMU QMP monitor."""
+    pass
+
+
+class QMPClient:
+    """Client for the QMP monitor over a Unix socket.
+
+    Uses a persistent connection: the greeting and capabilities negotiation
+    happen once, then every command reuses the same socket until it fails.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the socket connection."""
+        if self._sock:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except Exception:
+                pass
+            self._sock = None
+            self._reader = None
+
+    def _read_message(self) -> dict:
+        """Read one JSON message (QMP messages are newline-terminated)."""
+        line = self._reader.readline()
+        if not line:
+            raise QMPError("QMP connection closed by QEMU")
+        return json.loads(line)
+
+    def _ensure_connected(self):
+        """Connect and negotiate capabilities on first use."""
+        if self._sock is not None:
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+
+        greeting = self._read_message()
+        if "QMP" not in greeting:
+            raise QMPError(f"Unexpected QMP greeting: {str(greeting)[:120]}")
+        self._command({"execute": "qmp_capabilities"})
+
+    def _command(self, command: dict) -> dict:
+        """Send a command and wait for its response, skipping async events."""
+        self._sock.sendall(json.dumps(command).encode() + b'\n')
+        while True:
+            resp = self._read_message()
+            if "event" in resp:
+                logger.debug(f"QMP event: {resp['event']}")
+                continue
+            if "error" in resp:
+                err = resp["error"]
+                raise QMPError(f"{command.get('execute')} failed: {err.get('desc', err)}")
+            return resp
+
+    def execute(self, cmd: str, arguments: Optional[dict] = None) -> dict:
+        """Execute a QMP command on the persistent connection.
+
+        Returns:
+            The command's "return" value
+        """
+        command = {"execute": cmd}
+        if arguments:
+            command["arguments"] = arguments
+        try:
+            self._ensure_connected()
+            return self._command(command).get("return", {})
+        except QMPError:
+            self.close()
+            raise
+        except socket.timeout:
+            self.close()
+            raise QMPError(f"Timeout waiting for {cmd} (>{self.timeout}s)")
+        except (ConnectionRefusedError, FileNotFoundError):
+            self.close()
+            raise QMPError(f"QMP socket not available: {self.socket_path}")
+        except Exception as e:
+            self.close()
+            raise QMPError(f"QMP communication error for {cmd}: {e}")
+
+    def system_powerdown(self):
+        """Ask the guest to shut down via an ACPI power button press."""
+        self.execute("system_powerdown")
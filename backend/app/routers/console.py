@@ -69,7 +69,9 @@ async def download_spice_tools(
 ):
     """Download spice-guest-tools ISO for Windows VMs"""
     try:
-        return vm_manager.download_spice_guest_tools()
+        # Download + ISO build take a while; keep the event loop responsive
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, vm_manager.download_spice_guest_tools)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -171,7 +173,10 @@ async def get_vnc_info(
 ):
     """Get VNC connection info, starting proxy if needed"""
     try:
-        vnc_info = vm_manager.get_vnc_connection(vm_id)
+        # Proxy startup does blocking file I/O and waits for websockify;
+        # run it in the thread pool so the event loop stays responsive
+        loop = asyncio.get_event_loop()
+        vnc_info = await loop.run_in_executor(None, vm_manager.get_vnc_connection, vm_id)
         return VNCConnectionInfo(**vnc_info)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -187,10 +192,8 @@ async def disconnect_vnc(
 ):
     """Disconnect VNC proxy for a VM"""
     try:
-        vm_manager.vnc_proxy_manager.stop_proxy(vm_id)
+        vm_manager.release_vnc_proxy(vm_id)
         if vm_id in vm_manager.vms:
-            vm_manager.vms[vm_id]['ws_port'] = None
-            vm_manager.vms[vm_id]['ws_proxy_pid'] = None
             vm_manager._save_vms()
         return VMResponse(success=True, message="VNC proxy disconnected successfully")
     except Exception as e:
@@ -110,7 +110,7 @@ async def collect_metrics_task():
 
             # VM metrics
             active_ids = set()
-            for vm_id, vm in vm_manager.vms.items():
+            for vm_id, vm in vm_manager.vms_snapshot():
                 if vm.get('status') != 'running' or not vm.get('pid'):
                     continue
                 active_ids.add(vm_id)
@@ -249,7 +249,7 @@ def create_metrics_ws_route(app):
                     }
 
                     active_vids = set()
-                    for vid, vm in vm_manager.vms.items():
+                    for vid, vm in vm_manager.vms_snapshot():
                         if vm.get('status') != 'running' or not vm.get('pid'):
                             continue
                         active_vids.add(vid)
@@ -1,6 +1,7 @@
 """Snapshot management endpoints."""
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from typing import Dict, List, Optional
 import logging
 
 from ..models import Snapshot, SnapshotCreate, SnapshotResponse, VMResponse
@@ -12,6 +13,23 @@ logger = logging.getLogger("fast_vm.routers.snapshots")
 router = APIRouter(prefix="/api", tags=["snapshots"])
 
 
+@router.get("/snapshots", response_model=Dict[str, List[Snapshot]])
+async def list_snapshots_bulk(
+    vm_ids: Optional[str] = None,
+    current_user: AuthUserInfo = Depends(get_current_user),
+):
+    """List snapshots for several VMs (comma-separated vm_ids, default all)"""
+    ids = [v for v in vm_ids.split(',') if v] if vm_ids else [vm_id for vm_id, _ in vm_manager.vms_snapshot()]
+    try:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, vm_manager.list_snapshots_bulk, ids)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Internal error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get("/vms/{vm_id}/snapshots", response_model=List[Snapshot])
 async def list_snapshots(
     vm_id: str,
@@ -19,7 +37,9 @@ async def list_snapshots(
 ):
     """List snapshots for a VM"""
     try:
-        return vm_manager.list_snapshots(vm_id)
+        # qemu-img runs in the thread pool so the event loop stays responsive
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, vm_manager.list_snapshots, vm_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -35,7 +55,8 @@ async def create_snapshot(
 ):
     """Create a snapshot of a VM"""
     try:
-        snap = vm_manager.create_snapshot(vm_id, snap_data)
+        loop = asyncio.get_event_loop()
+        snap = await loop.run_in_executor(None, vm_manager.create_snapshot, vm_id, snap_data)
         return SnapshotResponse(success=True, message=f"Snapshot '{snap.name}' created successfully", snapshot=snap)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -52,7 +73,8 @@ async def restore_snapshot(
 ):
     """Restore a VM to a snapshot"""
     try:
-        vm = vm_manager.restore_snapshot(vm_id, snap_id)
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(None, vm_manager.restore_snapshot, vm_id, snap_id)
         return VMResponse(success=True, message=f"VM '{vm.name}' restored to snapshot successfully", vm=vm)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -69,7 +91,8 @@ async def delete_snapshot(
 ):
     """Delete a snapshot"""
     try:
-        vm_manager.delete_snapshot(vm_id, snap_id)
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, vm_manager.delete_snapshot, vm_id, snap_id)
         return SnapshotResponse(success=True, message="Snapshot deleted successfully")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,4 +1,6 @@
 """VM CRUD and lifecycle endpoints."""
+import asyncio
+import functools
 from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List
 import logging
@@ -42,7 +44,9 @@ async def create_vm(
 ):
     """Create a new VM"""
     try:
-        vm = vm_manager.create_vm(vm_data)
+        # qemu-img runs in the thread pool so the event loop stays responsive
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(None, vm_manager.create_vm, vm_data)
         log_action(current_user.username, "create_vm", "vm", vm.id, {"name": vm.name}, request.client.host if request.client else None)
         return VMResponse(success=True, message=f"VM '{vm.name}' created successfully", vm=vm)
     except Exception as e:
@@ -57,7 +61,10 @@ async def start_vm(
 ):
     """Start a VM"""
     try:
-        vm = vm_manager.start_vm(vm_id)
+        # QEMU launch (and macvtap/swtpm setup) runs in the thread pool so
+        # concurrent starts overlap and the event loop stays responsive
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(None, vm_manager.start_vm, vm_id)
         log_action(current_user.username, "start_vm", "vm", vm_id, {"name": vm.name}, request.client.host if request.client else None)
         return VMResponse(success=True, message=f"VM '{vm.name}' started successfully", vm=vm)
     except ValueError as e:
@@ -75,11 +82,14 @@ async def start_vm(
 async def stop_vm(
     request: Request,
     vm_id: str,
+    force: bool = False,
     current_user: AuthUserInfo = Depends(get_current_user),
 ):
-    """Stop a VM"""
+    """Stop a VM (ACPI shutdown; force=true terminates QEMU immediately)"""
     try:
-        vm = vm_manager.stop_vm(vm_id)
+        # stop_vm can wait for the guest's ACPI shutdown
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(None, functools.partial(vm_manager.stop_vm, vm_id, force=force))
         log_action(current_user.username, "stop_vm", "vm", vm_id, {"name": vm.name}, request.client.host if request.client else None)
         return VMResponse(success=True, message=f"VM '{vm.name}' stopped successfully", vm=vm)
     except ValueError as e:
@@ -96,7 +106,8 @@ async def restart_vm(
 ):
     """Restart a VM"""
     try:
-        vm = vm_manager.restart_vm(vm_id)
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(None, vm_manager.restart_vm, vm_id)
         return VMResponse(success=True, message=f"VM '{vm.name}' restarted successfully", vm=vm)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -114,7 +125,14 @@ async def clone_vm(
 ):
     """Clone a VM (must be stopped)"""
     try:
-        vm = vm_manager.clone_vm(vm_id, name=clone_data.name, memory=clone_data.memory, cpus=clone_data.cpus)
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(
+            None,
+            functools.partial(
+                vm_manager.clone_vm, vm_id,
+                name=clone_data.name, memory=clone_data.memory, cpus=clone_data.cpus,
+            ),
+        )
         log_action(current_user.username, "clone_vm", "vm", vm.id, {"source_id": vm_id, "name": vm.name}, request.client.host if request.client else None)
         return VMResponse(success=True, message=f"VM '{vm.name}' cloned successfully", vm=vm)
     except ValueError as e:
@@ -132,7 +150,11 @@ async def update_vm(
 ):
     """Update VM configuration"""
     try:
-        vm = vm_manager.update_vm(vm_id, updates.model_dump(exclude_unset=True))
+        # update_vm takes the per-VM lock, which a stop may hold for a while
+        loop = asyncio.get_event_loop()
+        vm = await loop.run_in_executor(
+            None, vm_manager.update_vm, vm_id, updates.model_dump(exclude_unset=True),
+        )
         return VMResponse(success=True, message=f"VM '{vm.name}' updated successfully", vm=vm)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -151,7 +173,9 @@ async def delete_vm(
     try:
         vm = vm_manager.get_vm(vm_id)
         vm_name = vm.name if vm else "Unknown"
-        vm_manager.delete_vm(vm_id)
+        # delete_vm waits on the per-VM lock and may stop the VM first
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, vm_manager.delete_vm, vm_id)
         log_action(current_user.username, "delete_vm", "vm", vm_id, {"name": vm_name}, request.client.host if request.client else None)
         return VMResponse(success=True, message=f"VM '{vm_name}' deleted successfully")
     except ValueError as e:
@@ -1,4 +1,5 @@
 """Volume management endpoints."""
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 import logging
@@ -39,7 +40,9 @@ async def create_volume(
 ):
     """Create a new volume"""
     try:
-        vol = vm_manager.create_volume(vol_data)
+        # qemu-img runs in the thread pool so the event loop stays responsive
+        loop = asyncio.get_event_loop()
+        vol = await loop.run_in_executor(None, vm_manager.create_volume, vol_data)
         log_action(current_user.username, "create_volume", "volume", vol.id, {"name": vol.name})
         return VolumeResponse(success=True, message=f"Volume '{vol.name}' created successfully", volume=vol)
     except Exception as e:
@@ -1,8 +1,12 @@
+import os
 import subprocess
 import psutil
 from pathlib import Path
 from typing import Optional, Dict
 
+from .net_utils import is_port_in_use
+from .process_utils import terminate_pid, wait_pid, LivenessCache, PROXY_STARTUP_TIMEOUT
+
 
 class SpiceProxyManager:
     """Manager for SPICE websocket proxies using websockify"""
@@ -26,8 +30,26 @@ class SpiceProxyManager:
         self.proxies_dir.mkdir(parents=True, exist_ok=True)
 
         self.spice_html5_path = Path(spice_html5_path)
+
+        # Per-VM state file paths, formatted with the vm_id
+        self._pid_file_tmpl = str(self.proxies_dir / "spice_{}.pid")
+        self._log_file_tmpl = str(self.proxies_dir / "spice_{}.log")
+
         self.proxy_state: Dict[str, Dict] = {}
 
+        # Short-TTL cache of process liveness checks
+        self._liveness = LivenessCache()
+
+        # Resolve websockify once (prefer the venv binary) and keep the fixed argv prefix
+        venv_websockify = Path(__file__).parent.parent / "venv" / "bin" / "websockify"
+        websockify_cmd = str(venv_websockify) if venv_websockify.exists() else "websockify"
+        self._websockify_cmd_prefix = [
+            websockify_cmd,
+            "--web", str(self.spice_html5_path),
+            "--timeout", "0",
+            "--idle-timeout", "0",
+        ]
+
     def _get_free_ws_port(self, used_ports: set) -> int:
         """Get a free WebSocket port starting from 6800
 
@@ -43,28 +65,12 @@ class SpiceProxyManager:
         raise RuntimeError("No free WebSocket ports available for SPICE")
 
     def _is_port_in_use(self, port: int) -> bool:
-        """Check if a port is in use via socket connect (avoids psutil AccessDenied)"""
-        import socket
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(1)
-                return s.connect_ex(('127.0.0.1', port)) == 0
-        except Exception:
-            try:
-                for conn in psutil.net_connections():
-                    if conn.laddr.port == port:
-                        return True
-            except (psutil.AccessDenied, OSError):
-                pass
-            return False
+        """Check if a port is in use (bind probe, see net_utils.is_port_in_use)"""
+        return is_port_in_use(port)
 
     def _is_process_running(self, pid: int) -> bool:
-        """Check if a process is running"""
-        try:
-            process = psutil.Process(pid)
-            return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return False
+        """Check if a process is running (cached briefly per PID)"""
+        return self._liveness.is_running(pid)
 
     def start_proxy(self, vm_id: str, spice_port: int, used_ws_ports: set) -> Dict:
         """Start websockify proxy for SPICE
@@ -90,21 +96,10 @@ class SpiceProxyManager:
         ws_port = self._get_free_ws_port(used_ws_ports)
 
         # Prepare websockify command
-        pid_file = self.proxies_dir / f"spice_{vm_id}.pid"
-        log_file = self.proxies_dir / f"spice_{vm_id}.log"
+        pid_file = self._pid_file_tmpl.format(vm_id)
+        log_file = self._log_file_tmpl.format(vm_id)
 
-        # Use websockify from venv
-        venv_websockify = Path(__file__).parent.parent / "venv" / "bin" / "websockify"
-        websockify_cmd = str(venv_websockify) if venv_websockify.exists() else "websockify"
-
-        cmd = [
-            websockify_cmd,
-            "--web", str(self.spice_html5_path),
-            "--timeout", "0",
-            "--idle-timeout", "0",
-            str(ws_port),
-            f"localhost:{spice_port}"
-        ]
+        cmd = [*self._websockify_cmd_prefix, str(ws_port), f"localhost:{spice_port}"]
 
         try:
             # Start websockify process in background
@@ -118,19 +113,20 @@ class SpiceProxyManager:
 
             pid = process.pid
 
-            # Wait and verify process is running
-            import time
-            time.sleep(0.5)
-
-            if not self._is_process_running(pid):
+            # Wait out websockify's startup window, waking early if it exits
+            if wait_pid(pid, PROXY_STARTUP_TIMEOUT):
                 log_f.close()
                 with open(log_file, 'r') as f:
                     log_content = f.read()
                 raise RuntimeError(f"websockify process died immediately. Log: {log_content}")
 
-            # Save PID to file
-            with open(pid_file, 'w') as f:
-                f.write(str(pid))
+            # Save PID to file in a single write
+            fd = os.open(pid_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, f"{pid}\n".encode())
+                os.fsync(fd)
+            finally:
+                os.close(fd)
 
             # Store state
             self.proxy_state[vm_id] = {
@@ -145,9 +141,9 @@ class SpiceProxyManager:
             }
 
         except Exception as e:
-            if pid_file.exists():
-                pid_file.unlink()
-            if log_file.exists():
+            if os.path.exists(pid_file):
+                os.unlink(pid_file)
+            if os.path.exists(log_file):
                 with open(log_file, 'r') as f:
                     log_content = f.read()
                 raise RuntimeError(f"Failed to start websockify: {str(e)}. Log: {log_content}")
@@ -158,32 +154,24 @@ class SpiceProxyManager:
         if vm_id in self.proxy_state:
             pid = self.proxy_state[vm_id].get('pid')
             if pid and self._is_process_running(pid):
-                try:
-                    process = psutil.Process(pid)
-                    process.terminate()
-                    process.wait(timeout=5)
-                except (psutil.NoSuchProcess, psutil.TimeoutExpired):
-                    try:
-                        if self._is_process_running(pid):
-                            process.kill()
-                    except psutil.NoSuchProcess:
-                        pass
+                terminate_pid(pid, timeout=5)
+                self._liveness.invalidate(pid)
 
             del self.proxy_state[vm_id]
 
         # Cleanup PID file
-        pid_file = self.proxies_dir / f"spice_{vm_id}.pid"
-        if pid_file.exists():
-            pid_file.unlink()
+        pid_file = self._pid_file_tmpl.format(vm_id)
+        if os.path.exists(pid_file):
+            os.unlink(pid_file)
 
         return True
 
     def get_proxy_status(self, vm_id: str) -> Dict:
         """Get proxy status for a VM"""
         # Also check PID file in case state was lost (e.g., server restart)
-        pid_file = self.proxies_dir / f"spice_{vm_id}.pid"
+        pid_file = self._pid_file_tmpl.format(vm_id)
 
-        if vm_id not in self.proxy_state and pid_file.exists():
+        if vm_id not in self.proxy_state and os.path.exists(pid_file):
             try:
                 with open(pid_file, 'r') as f:
                     pid = int(f.read().strip())
@@ -208,8 +196,8 @@ class SpiceProxyManager:
 
         if vm_id not in self.proxy_state:
             # Cleanup stale PID file
-            if pid_file.exists():
-                pid_file.unlink()
+            if os.path.exists(pid_file):
+                os.unlink(pid_file)
             return {'status': 'stopped'}
 
         state = self.proxy_state[vm_id]
@@ -224,12 +212,12 @@ class SpiceProxyManager:
         else:
             del self.proxy_state[vm_id]
             # Cleanup stale PID file
-            if pid_file.exists():
-                pid_file.unlink()
+            if os.path.exists(pid_file):
+                os.unlink(pid_file)
             return {'status': 'stopped'}
 
     def cleanup_all(self):
         """Stop all proxies and cleanup"""
-        vm_ids = list(self.proxy_state.keys())
-        for vm_id in vm_ids:
-            self.stop_proxy(vm_id)
+        # stop_proxy() removes the entry, so drain the dict without copying its keys
+        while self.proxy_state:
+            self.stop_proxy(next(iter(self.proxy_state)))
@@ -1,9 +1,11 @@
 import os
 import subprocess
-import psutil
 from pathlib import Path
 from typing import Optional, Dict
 
+from .net_utils import is_port_in_use
+from .process_utils import terminate_pid, wait_pid, LivenessCache, PROXY_STARTUP_TIMEOUT
+
 
 class VNCProxyManager:
     def __init__(self, proxies_dir: Optional[Path] = None, novnc_path: Optional[Path] = None):
@@ -27,6 +29,9 @@ class VNCProxyManager:
         self.novnc_path = Path(novnc_path)
         self.proxy_state: Dict[str, Dict] = {}
 
+        # Short-TTL cache of process liveness checks
+        self._liveness = LivenessCache()
+
     def _get_free_ws_port(self, used_ports: set) -> int:
         """Get a free WebSocket port starting from 6900
 
@@ -42,7 +47,7 @@ class VNCProxyManager:
         raise RuntimeError("No free WebSocket ports available")
 
     def _is_port_in_use(self, port: int) -> bool:
-        """Check if a port is in use via socket connect (avoids psutil AccessDenied)
+        """Check if a port is in use (bind probe, see net_utils.is_port_in_use)
 
         Args:
             port: Port number to check
@@ -50,22 +55,10 @@ class VNCProxyManager:
         Returns:
             True if port is in use
         """
-        import socket
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(1)
-                return s.connect_ex(('127.0.0.1', port)) == 0
-        except Exception:
-            try:
-                for conn in psutil.net_connections():
-                    if conn.laddr.port == port:
-                        return True
-            except (psutil.AccessDenied, OSError):
-                pass
-            return False
+        return is_port_in_use(port)
 
     def _is_process_running(self, pid: int) -> bool:
-        """Check if a process is running
+        """Check if a process is running (cached briefly per PID)
 
         Args:
             pid: Process ID to check
@@ -73,19 +66,18 @@ class VNCProxyManager:
         Returns:
             True if process is running
         """
-        try:
-            process = psutil.Process(pid)
-            return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return False
+        return self._liveness.is_running(pid)
 
-    def start_proxy(self, vm_id: str, vnc_port: int, used_ws_ports: set) -> Dict:
+    def start_proxy(self, vm_id: str, vnc_port: int, used_ws_ports: set,
+                    ws_port: Optional[int] = None) -> Dict:
         """Start websockify proxy for a VM
 
         Args:
             vm_id: VM identifier
             vnc_port: VNC port number (5900-5999)
             used_ws_ports: Set of WebSocket ports already in use
+            ws_port: WebSocket port already reserved by the caller; picked
+                from the free ports when None
 
         Returns:
             Dict with ws_port and ws_proxy_pid
@@ -103,7 +95,8 @@ class VNCProxyManager:
                 }
 
         # Get free WebSocket port
-        ws_port = self._get_free_ws_port(used_ws_ports)
+        if ws_port is None:
+            ws_port = self._get_free_ws_port(used_ws_ports)
 
         # Prepare websockify command
         # Run in foreground but detached from terminal with stdout/stderr redirected
@@ -136,20 +129,22 @@ class VNCProxyManager:
             # Get PID immediately
             pid = process.pid
 
-            # Wait a bit and verify process is still running
-            import time
-            time.sleep(0.5)
-
-            if not self._is_process_running(pid):
+            # Give websockify its startup window, but return as soon as it
+            # exits (pidfd wakeup) instead of always sleeping the full window
+            if wait_pid(pid, PROXY_STARTUP_TIMEOUT):
                 # Process died, read log
                 log_f.close()
                 with open(log_file, 'r') as f:
                     log_content = f.read()
                 raise RuntimeError(f"websockify process died immediately. Log: {log_content}")
 
-            # Save PID to file for future reference
-            with open(pid_file, 'w') as f:
-                f.write(str(pid))
+            # Save PID to file for future reference in a single write
+            fd = os.open(pid_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, f"{pid}\n".encode())
+                os.fsync(fd)
+            finally:
+                os.close(fd)
 
             # Store state
             self.proxy_state[vm_id] = {
@@ -187,16 +182,8 @@ class VNCProxyManager:
         if vm_id in self.proxy_state:
             pid = self.proxy_state[vm_id].get('pid')
             if pid and self._is_process_running(pid):
-                try:
-                    process = psutil.Process(pid)
-                    process.terminate()
-                    process.wait(timeout=5)
-                except (psutil.NoSuchProcess, psutil.TimeoutExpired):
-                    try:
-                        if self._is_process_running(pid):
-                            process.kill()
-                    except psutil.NoSuchProcess:
-                        pass
+                terminate_pid(pid, timeout=5)
+                self._liveness.invalidate(pid)
 
             del self.proxy_state[vm_id]
 
@@ -248,12 +235,8 @@ class VNCProxyManager:
 
                 # If process is running but not in our state, it's orphaned
                 if self._is_process_running(pid) and vm_id not in self.proxy_state:
-                    try:
-                        process = psutil.Process(pid)
-                        process.terminate()
-                        process.wait(timeout=5)
-                    except (psutil.NoSuchProcess, psutil.TimeoutExpired):
-                        pass
+                    terminate_pid(pid, timeout=5)
+                    self._liveness.invalidate(pid)
 
                 # Remove PID file
                 pid_file.unlink()
@@ -268,8 +251,8 @@ class VNCProxyManager:
 
         Called on application shutdown
         """
-        vm_ids = list(self.proxy_state.keys())
-        for vm_id in vm_ids:
-            self.stop_proxy(vm_id)
+        # stop_proxy() removes the entry, so drain the dict without copying its keys
+        while self.proxy_state:
+            self.stop_proxy(next(iter(self.proxy_state)))
 
         self.cleanup_orphaned_proxies()
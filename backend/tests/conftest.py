@@ -1,5 +1,7 @@
 """Shared fixtures for tests"""
 import pytest
+import bcrypt
+import functools
 import os
 import sys
 
@@ -20,6 +22,19 @@ from pathlib import Path
 limiter.enabled = False
 
 
+@pytest.fixture(scope="session", autouse=True)
+def fast_bcrypt():
+    """Hash passwords at bcrypt's minimum cost factor
+
+    Every test seeds an admin user, and the default cost (12 rounds) makes
+    each hash take a few hundred ms. Verification reads the cost from the
+    hash, so logins against these hashes are just as fast and still real.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(bcrypt, "gensalt", functools.partial(bcrypt.gensalt, rounds=4))
+        yield
+
+
 @pytest.fixture(autouse=True)
 def temp_dirs(tmp_path):
     """Create temporary directories for VMs and users (SQLite-backed)"""
@@ -53,6 +68,7 @@ def temp_dirs(tmp_path):
     }
 
     # Restore originals
+    auth_module.clear_token_cache()
     db_module.DB_DIR = original_db_dir
     db_module.DB_PATH = original_db_path
 
@@ -69,6 +85,7 @@ def app_client(temp_dirs):
     orig_volumes_dir = vm_manager.volumes_dir
     orig_vms = vm_manager.vms
     orig_volumes = getattr(vm_manager, 'volumes', {})
+    orig_used_ws_ports = vm_manager._used_ws_ports
 
     vm_manager.vms_dir = Path(temp_dirs["vms_dir"])
     vm_manager.config_file = vm_manager.vms_dir / "vms.json"
@@ -76,6 +93,7 @@ def app_client(temp_dirs):
     vm_manager.volumes_dir = Path(temp_dirs["vms_dir"]) / "volumes"
     vm_manager.vms = {}
     vm_manager.volumes = {}
+    vm_manager._used_ws_ports = set()
 
     transport = ASGITransport(app=fastapi_app)
     client = AsyncClient(transport=transport, base_url="http://test")
@@ -89,6 +107,7 @@ def app_client(temp_dirs):
     vm_manager.volumes_dir = orig_volumes_dir
     vm_manager.vms = orig_vms
     vm_manager.volumes = orig_volumes
+    vm_manager._used_ws_ports = orig_used_ws_ports
 
 
 @pytest.fixture
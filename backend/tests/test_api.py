@@ -1,7 +1,12 @@
 """Tests for VM, Volume, and System API endpoints"""
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 
+from app import vm_manager as vm_manager_module
+from app.deps import vm_manager
+from app.vm_manager import VMManager
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -121,6 +126,29 @@ async def test_clone_vm(app_client, auth_headers):
 # ==================== Volume Tests ====================
 
 
+async def test_start_vm_setup_failure_persists_state(app_client, auth_headers):
+    """A failure before QEMU launches still saves the backfilled SPICE port"""
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=0)
+        create_resp = await app_client.post(
+            "/api/vms",
+            headers=auth_headers,
+            json={"name": "Legacy", "memory": 512, "cpus": 1, "disk_size": 5},
+        )
+    vm_id = create_resp.json()["vm"]["id"]
+    vm_manager.vms[vm_id]["spice_port"] = None
+    vm_manager._save_vms()
+
+    with patch.object(vm_manager, '_start_swtpm', return_value=None), \
+            patch.object(vm_manager, '_network_args', side_effect=ValueError("bad network")):
+        response = await app_client.post(f"/api/vms/{vm_id}/start", headers=auth_headers)
+    assert response.status_code == 400
+
+    saved = json.loads(vm_manager.config_file.read_text())
+    assert saved[vm_id]["spice_port"] == vm_manager.vms[vm_id]["spice_port"]
+    assert saved[vm_id]["spice_port"] is not None
+
+
 async def test_list_volumes_empty(app_client, auth_headers):
     """Test listing volumes when none exist"""
     response = await app_client.get("/api/volumes", headers=auth_headers)
@@ -207,3 +235,85 @@ async def test_create_cloudinit(app_client, auth_headers):
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
+
+
+async def test_audit_logs_include_queued_actions(app_client, auth_headers):
+    """Test audit actions queued by log_action are visible to the audit log query"""
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=0)
+        await app_client.post(
+            "/api/volumes",
+            headers=auth_headers,
+            json={"name": "audited-vol", "size_gb": 5, "format": "qcow2"},
+        )
+    response = await app_client.get("/api/audit-logs?action=create_volume", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] >= 1
+    assert data["logs"][0]["details"] == {"name": "audited-vol"}
+
+
+async def test_list_snapshots_bulk(app_client, auth_headers):
+    """Bulk snapshot listing returns an entry per VM and 404s on unknown IDs"""
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=0)
+        create_resp = await app_client.post(
+            "/api/vms",
+            headers=auth_headers,
+            json={"name": "SnapBulk", "memory": 512, "cpus": 1, "disk_size": 5},
+        )
+    vm_id = create_resp.json()["vm"]["id"]
+
+    response = await app_client.get("/api/snapshots", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {vm_id: []}
+
+    response = await app_client.get(
+        "/api/snapshots", headers=auth_headers, params={"vm_ids": f"{vm_id},missing"}
+    )
+    assert response.status_code == 404
+
+
+async def test_list_snapshots_bulk_bounds_qemu_img(tmp_path):
+    """Bulk listing never runs more than SNAPSHOT_LIST_CONCURRENCY qemu-img at once"""
+    manager = VMManager(vms_dir=str(tmp_path / "bulk" / "vms"))
+    for i in range(5):
+        disk = tmp_path / f"disk{i}.qcow2"
+        disk.write_bytes(b"x")
+        manager.vms[f"vm{i}"] = {"id": f"vm{i}", "disk_path": str(disk), "snapshots": {}}
+
+    live = []
+    peak = []
+
+    class FakeQemuImg:
+        returncode = 0
+
+        def __init__(self, *args, **kwargs):
+            live.append(self)
+            peak.append(len(live))
+
+        def communicate(self):
+            live.remove(self)
+            return json.dumps({"snapshots": [{"name": "s1", "date-sec": 0}]}).encode(), None
+
+    with patch.object(vm_manager_module, "SNAPSHOT_LIST_CONCURRENCY", 2), \
+            patch("subprocess.Popen", FakeQemuImg):
+        result = manager.list_snapshots_bulk(list(manager.vms))
+
+    assert max(peak) == 2
+    assert len(peak) == 5
+    assert all([s.id for s in snaps] == ["s1"] for snaps in result.values())
+
+
+@pytest.mark.parametrize("parent_iface, mac", [
+    ("eth0\n", "52:54:00:12:34:56"),
+    ("eth0\nlink delete eth1", "52:54:00:12:34:56"),
+    ("eth0 type dummy", "52:54:00:12:34:56"),
+    ("eth0", "52:54:00:12:34:56\n"),
+    ("eth0", "52:54:00:12:34:56\nlink delete eth0"),
+])
+async def test_create_macvtap_rejects_injection(parent_iface, mac):
+    """Nothing reaches `ip -batch` unless the interface and MAC are single tokens"""
+    with patch("subprocess.run") as mock_run:
+        assert vm_manager._create_macvtap("mvttest0", parent_iface, mac) is None
+    mock_run.assert_not_called()
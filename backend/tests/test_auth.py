@@ -1,5 +1,6 @@
 """Tests for authentication endpoints"""
 import pytest
+from app.auth import create_access_token
 
 pytestmark = pytest.mark.asyncio
 
@@ -114,6 +115,23 @@ async def test_delete_user(app_client, auth_headers):
     assert response.json()["success"] is True
 
 
+async def test_deleted_user_token_rejected(app_client, auth_headers):
+    """Test that a cached token stops working once its user is deleted"""
+    await app_client.post(
+        "/api/auth/users",
+        headers=auth_headers,
+        json={"username": "shortlived", "password": "Short1Pass", "is_admin": False},
+    )
+    token = create_access_token({"sub": "shortlived"})
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await app_client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+
+    await app_client.delete("/api/auth/users/shortlived", headers=auth_headers)
+    response = await app_client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 401
+
+
 async def test_delete_self_fails(app_client, auth_headers):
     """Test that admin cannot delete themselves"""
     response = await app_client.delete(
@@ -0,0 +1,126 @@
+"""Tests for VM backup and restore"""
+import io
+import json
+import os
+import shutil
+import tarfile
+from unittest.mock import patch
+
+import pytest
+
+from app.vm_manager import VMManager
+
+_real_which = shutil.which
+
+
+@pytest.fixture(params=["native", "tarfile"])
+def manager(request, tmp_path):
+    """A VMManager on a temp dir, archiving with native tar or with tarfile"""
+    manager = VMManager(vms_dir=str(tmp_path / "store" / "vms"))
+    if request.param == "native":
+        if not _real_which("tar"):
+            pytest.skip("tar not installed")
+        yield manager
+    else:
+        def which(cmd, *args, **kwargs):
+            return None if cmd == "tar" else _real_which(cmd, *args, **kwargs)
+
+        with patch("shutil.which", side_effect=which):
+            yield manager
+
+
+def _create_stopped_vm(manager, vm_id="backup-vm"):
+    """Helper: insert a stopped VM with a disk and OVMF vars on disk"""
+    vm_dir = manager.vms_dir / vm_id
+    vm_dir.mkdir()
+    disk = vm_dir / "disk.qcow2"
+    disk.write_bytes(os.urandom(64 * 1024) + b"\0" * (256 * 1024))
+    (vm_dir / "OVMF_VARS.fd").write_bytes(b"v" * 4096)
+    manager.vms[vm_id] = {
+        "id": vm_id,
+        "name": "Backup VM",
+        "status": "stopped",
+        "memory": 1024,
+        "cpus": 1,
+        "disk_size": 10,
+        "disk_path": str(disk),
+        "vnc_port": 5900,
+        "spice_port": 5800,
+        "pid": None,
+        "networks": [{"id": "net0", "type": "nat", "mac_address": "52:54:00:00:00:01"}],
+        "volumes": [],
+        "boot_order": ["disk"],
+    }
+    return vm_id
+
+
+def _vm_dirs(manager):
+    return sorted(p.name for p in manager.vms_dir.iterdir() if p.is_dir() and p.name != "volumes")
+
+
+def test_backup_list_restore_round_trip(manager):
+    """A backup shows up in list_backups and restores to an identical disk"""
+    vm_id = _create_stopped_vm(manager)
+    source_disk = manager.vms_dir / vm_id / "disk.qcow2"
+
+    backup = manager.backup_vm(vm_id)
+    assert backup["vm_name"] == "Backup VM"
+    assert not (manager.vms_dir / vm_id / "vm_config.json").exists()
+
+    backups = manager.list_backups()
+    assert [b["name"] for b in backups] == [backup["backup_name"]]
+    assert backups[0]["path"] == backup["backup_path"]
+
+    vm = manager.restore_vm(backups[0]["path"], "Restored VM")
+    assert vm.id != vm_id
+    assert vm.name == "Restored VM"
+    assert vm.status == "stopped"
+    assert vm.vnc_port != 5900
+
+    restored_dir = manager.vms_dir / vm.id
+    assert sorted(os.listdir(restored_dir)) == ["OVMF_VARS.fd", "disk.qcow2"]
+    assert (restored_dir / "disk.qcow2").read_bytes() == source_disk.read_bytes()
+    assert manager.vms[vm.id]["disk_path"] == str(restored_dir / "disk.qcow2")
+    assert manager.vms[vm.id]["networks"][0]["mac_address"] != "52:54:00:00:00:01"
+
+
+def test_restore_rejects_path_traversal(manager, tmp_path):
+    """A member escaping the VM dir fails the restore and leaves no VM behind"""
+    _create_stopped_vm(manager)
+    dirs_before = _vm_dirs(manager)
+
+    backup_path = manager.backups_dir / "evil.tar.gz"
+    with tarfile.open(backup_path, "w:gz") as tar:
+        for name, data in [
+            ("vm_config.json", json.dumps({"name": "evil"}).encode()),
+            ("../escaped.txt", b"gotcha"),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    with pytest.raises(ValueError):
+        manager.restore_vm(str(backup_path))
+
+    assert _vm_dirs(manager) == dirs_before
+    assert not (manager.vms_dir / "escaped.txt").exists()
+    assert len(manager.vms) == 1
+
+
+def test_restore_missing_backup(manager, tmp_path):
+    """Restoring a nonexistent file fails before creating anything"""
+    with pytest.raises(ValueError, match="not found"):
+        manager.restore_vm(str(tmp_path / "nope.tar.gz"))
+    assert _vm_dirs(manager) == []
+
+
+def test_list_backups_newest_first(manager):
+    """Backups are ordered by created_at (file mtime), not by name"""
+    for name, mtime in [("b_vm.tar.gz", 3000), ("a_vm.tar.gz", 1000), ("c_vm.tar.gz", 2000)]:
+        path = manager.backups_dir / name
+        path.write_bytes(b"x")
+        os.utime(path, (mtime, mtime))
+
+    backups = manager.list_backups()
+    assert [b["name"] for b in backups] == ["b_vm.tar.gz", "c_vm.tar.gz", "a_vm.tar.gz"]
+    assert [b["created_at"] for b in backups] == sorted((b["created_at"] for b in backups), reverse=True)
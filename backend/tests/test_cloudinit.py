@@ -0,0 +1,64 @@
+"""Tests for cloud-init ISO generation"""
+import io
+from unittest.mock import patch
+
+import pytest
+
+from app import vm_manager as vm_manager_module
+from app.models import CloudInitConfig
+from app.vm_manager import VMManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return VMManager(vms_dir=str(tmp_path / "vms"))
+
+
+def _config():
+    return CloudInitConfig(
+        hostname="ci-test",
+        username="ubuntu",
+        password="secret",
+        static_ip="192.168.1.50/24",
+        gateway="192.168.1.1",
+    )
+
+
+def test_cloudinit_iso_prefers_iso_tools(manager):
+    """genisoimage is the primary builder; pycdlib is not touched when it works"""
+    with patch.object(vm_manager_module, '_iso_tool_cmds', return_value=(("genisoimage",),)), \
+            patch("subprocess.run") as mock_run, \
+            patch.object(VMManager, '_write_cloudinit_iso') as mock_pycdlib:
+        iso_path = manager.create_cloudinit_iso(_config())
+
+    cmd = mock_run.call_args[0][0]
+    assert cmd[0] == "genisoimage"
+    assert cmd[cmd.index("-volid") + 1] == "cidata"
+    assert cmd[cmd.index("-output") + 1] == iso_path
+    mock_pycdlib.assert_not_called()
+
+
+def test_cloudinit_iso_pycdlib_fallback(manager):
+    """Without ISO tools, pycdlib writes a cidata ISO cloud-init can read"""
+    pycdlib = pytest.importorskip("pycdlib")
+
+    with patch.object(vm_manager_module, '_iso_tool_cmds', return_value=(("/nonexistent/genisoimage",),)):
+        iso_path = manager.create_cloudinit_iso(_config())
+
+    iso = pycdlib.PyCdlib()
+    iso.open(iso_path)
+    try:
+        assert iso.pvd.volume_identifier.rstrip() == b"cidata"
+
+        expected = ["meta-data", "network-config", "user-data"]
+        for kwargs in ({"rr_path": "/"}, {"joliet_path": "/"}):
+            _, _, names = next(iso.walk(**kwargs))
+            assert sorted(names) == expected
+
+        out = io.BytesIO()
+        iso.get_file_from_iso_fp(out, rr_path="/user-data")
+        user_data = out.getvalue().decode()
+        assert user_data.startswith("#cloud-config\n")
+        assert "hostname: ci-test" in user_data
+    finally:
+        iso.close()
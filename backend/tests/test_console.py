@@ -2,6 +2,8 @@
 import pytest
 from unittest.mock import patch, MagicMock, PropertyMock
 
+from app.main import vm_manager
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -40,8 +42,6 @@ async def test_spice_connect_vm_not_found(app_client, auth_headers):
 
 async def test_spice_connect_vm_stopped(app_client, auth_headers):
     """SPICE connection should 400 if VM is stopped"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
     vm_manager.vms[vm_id]["status"] = "stopped"
 
@@ -55,8 +55,6 @@ async def test_spice_connect_vm_stopped(app_client, auth_headers):
 
 async def test_spice_connect_success(app_client, auth_headers):
     """SPICE connection should return connection info via built-in proxy"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
 
     # Mock _update_vm_status to not change the status
@@ -78,8 +76,6 @@ async def test_spice_connect_success(app_client, auth_headers):
 
 async def test_spice_connect_port_not_ready(app_client, auth_headers):
     """SPICE connection should 400 if SPICE port is not listening"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
 
     with patch.object(vm_manager, '_update_vm_status'):
@@ -94,8 +90,6 @@ async def test_spice_connect_port_not_ready(app_client, auth_headers):
 
 async def test_spice_connect_no_spice_port(app_client, auth_headers):
     """SPICE connection should 400 if VM has no SPICE port"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
     vm_manager.vms[vm_id]["spice_port"] = None
 
@@ -110,8 +104,6 @@ async def test_spice_connect_no_spice_port(app_client, auth_headers):
 
 async def test_spice_disconnect(app_client, auth_headers):
     """SPICE disconnect should stop the proxy"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
     vm_manager.vms[vm_id]["spice_ws_port"] = 6800
     vm_manager.vms[vm_id]["spice_proxy_pid"] = 12345
@@ -139,8 +131,6 @@ async def test_vnc_connect_vm_not_found(app_client, auth_headers):
 
 async def test_vnc_connect_vm_stopped(app_client, auth_headers):
     """VNC connection should 400 if VM is stopped"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
     vm_manager.vms[vm_id]["status"] = "stopped"
 
@@ -153,8 +143,6 @@ async def test_vnc_connect_vm_stopped(app_client, auth_headers):
 
 async def test_vnc_connect_success(app_client, auth_headers):
     """VNC connection should return ws_port when proxy starts successfully"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
 
     with patch.object(vm_manager, '_update_vm_status'):
@@ -174,8 +162,6 @@ async def test_vnc_connect_success(app_client, auth_headers):
 
 async def test_vnc_connect_proxy_already_running(app_client, auth_headers):
     """VNC connection should reuse existing proxy"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
 
     with patch.object(vm_manager, '_update_vm_status'):
@@ -193,8 +179,6 @@ async def test_vnc_connect_proxy_already_running(app_client, auth_headers):
 
 async def test_vnc_connect_no_vnc_port(app_client, auth_headers):
     """VNC connection should 400 if VM has no VNC port"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
     vm_manager.vms[vm_id]["vnc_port"] = None
 
@@ -209,8 +193,6 @@ async def test_vnc_connect_no_vnc_port(app_client, auth_headers):
 
 async def test_vnc_disconnect(app_client, auth_headers):
     """VNC disconnect should stop the proxy"""
-    from app.main import vm_manager
-
     vm_id = _create_running_vm(vm_manager)
     vm_manager.vms[vm_id]["ws_port"] = 6900
     vm_manager.vms[vm_id]["ws_proxy_pid"] = 54321
@@ -226,6 +208,37 @@ async def test_vnc_disconnect(app_client, auth_headers):
     del vm_manager.vms[vm_id]
 
 
+async def test_vnc_reconnect_releases_ws_port(app_client, auth_headers):
+    """Disconnecting should give the websocket port back for the next connect"""
+    vm_id = _create_running_vm(vm_manager)
+
+    def fake_start(vm_id, vnc_port, used_ws_ports, ws_port=None):
+        return {'ws_port': ws_port, 'ws_proxy_pid': 54321}
+
+    with patch.object(vm_manager, '_update_vm_status'), \
+            patch.object(vm_manager, '_save_vms'), \
+            patch.object(vm_manager.vnc_proxy_manager, 'get_proxy_status', return_value={'status': 'stopped'}), \
+            patch.object(vm_manager.vnc_proxy_manager, 'start_proxy', side_effect=fake_start), \
+            patch.object(vm_manager.vnc_proxy_manager, 'stop_proxy'):
+        first = await app_client.get(f"/api/vms/{vm_id}/vnc", headers=auth_headers)
+        assert vm_manager._used_ws_ports == {first.json()["ws_port"]}
+
+        response = await app_client.post(f"/api/vms/{vm_id}/vnc/disconnect", headers=auth_headers)
+        assert response.status_code == 200
+        assert vm_manager._used_ws_ports == set()
+        assert vm_manager.vms[vm_id]["ws_port"] is None
+
+        second = await app_client.get(f"/api/vms/{vm_id}/vnc", headers=auth_headers)
+        assert second.json()["ws_port"] == first.json()["ws_port"]
+        assert vm_manager._used_ws_ports == {second.json()["ws_port"]}
+
+        await app_client.post(f"/api/vms/{vm_id}/vnc/disconnect", headers=auth_headers)
+
+    assert vm_manager._used_ws_ports == set()
+
+    del vm_manager.vms[vm_id]
+
+
 # ==================== Console without Auth ====================
 
 
@@ -0,0 +1,167 @@
+"""Tests for process helpers, run against real child processes"""
+import os
+import select
+import signal
+import subprocess
+
+import pytest
+
+from app.process_utils import (
+    LivenessCache, PidWatcher, is_process_running, terminate_pid, wait_pid,
+)
+
+
+@pytest.fixture
+def spawn():
+    """Start child processes and make sure they are gone after the test"""
+    procs = []
+
+    def _spawn(args, **kwargs):
+        proc = subprocess.Popen(args, **kwargs)
+        procs.append(proc)
+        return proc
+
+    yield _spawn
+
+    for proc in procs:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def _wait_exited(pid: int):
+    """Block until a child has exited, leaving it unreaped (a zombie)"""
+    os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+
+
+# ==================== is_process_running ====================
+
+def test_is_process_running(spawn):
+    """A live child is running; after it is killed and reaped it is not"""
+    proc = spawn(["sleep", "30"])
+    assert is_process_running(proc.pid) is True
+
+    proc.kill()
+    proc.wait()
+    assert is_process_running(proc.pid) is False
+
+
+def test_is_process_running_invalid_pid():
+    """Non-positive PIDs are never running"""
+    assert is_process_running(0) is False
+    assert is_process_running(-1) is False
+
+
+def test_zombie_counts_as_dead(spawn):
+    """An exited but unreaped child is reported as not running"""
+    proc = spawn(["true"])
+    _wait_exited(proc.pid)
+
+    assert is_process_running(proc.pid) is False
+    proc.wait()
+
+
+# ==================== wait_pid / terminate_pid ====================
+
+def test_wait_pid_timeout(spawn):
+    """wait_pid returns False when the process outlives the timeout"""
+    proc = spawn(["sleep", "30"])
+    assert wait_pid(proc.pid, 0.05) is False
+    assert proc.poll() is None
+
+
+def test_wait_pid_exit(spawn):
+    """wait_pid returns True once the process exits and reaps our child"""
+    proc = spawn(["sleep", "30"])
+    os.kill(proc.pid, signal.SIGTERM)
+
+    assert wait_pid(proc.pid, 5) is True
+    assert is_process_running(proc.pid) is False
+
+
+def test_terminate_pid(spawn):
+    """terminate_pid stops a process that honours SIGTERM"""
+    proc = spawn(["sleep", "30"])
+    terminate_pid(proc.pid, 5)
+    assert is_process_running(proc.pid) is False
+
+
+def test_terminate_pid_escalates_to_sigkill(spawn):
+    """terminate_pid kills a process that ignores SIGTERM"""
+    proc = spawn(["sh", "-c", "trap '' TERM; echo ready; exec sleep 30"], stdout=subprocess.PIPE)
+    assert proc.stdout.readline() == b"ready\n"
+
+    terminate_pid(proc.pid, 0.1)
+    _wait_exited(proc.pid)
+    assert os.waitid(os.P_PID, proc.pid, os.WEXITED).si_status == signal.SIGKILL
+    proc.stdout.close()
+
+
+# ==================== LivenessCache ====================
+
+def test_liveness_cache_reuses_answer_until_invalidated(spawn):
+    """A cached answer survives the process exiting until invalidate()"""
+    cache = LivenessCache(ttl=60)
+    proc = spawn(["sleep", "30"])
+    assert cache.is_running(proc.pid) is True
+
+    proc.kill()
+    proc.wait()
+    assert cache.is_running(proc.pid) is True
+
+    cache.invalidate(proc.pid)
+    assert cache.is_running(proc.pid) is False
+
+
+def test_liveness_cache_expires(spawn):
+    """With a zero TTL every call looks the process up again"""
+    cache = LivenessCache(ttl=0)
+    proc = spawn(["sleep", "30"])
+    assert cache.is_running(proc.pid) is True
+
+    proc.kill()
+    proc.wait()
+    assert cache.is_running(proc.pid) is False
+
+
+# ==================== PidWatcher ====================
+
+@pytest.fixture
+def watcher():
+    watcher = PidWatcher()
+    probe = subprocess.Popen(["true"])
+    supported = watcher.watch("probe", probe.pid)
+    watcher.unwatch("probe")
+    probe.wait()
+    if not supported:
+        pytest.skip("pidfd/epoll not available")
+    return watcher
+
+
+def test_pid_watcher_reports_exit(spawn, watcher):
+    """watch -> exit -> drain() returns it and is_running() goes back to None"""
+    proc = spawn(["sleep", "30"])
+    assert watcher.watch("vm-1", proc.pid) is True
+    assert watcher.is_running("vm-1", proc.pid) is True
+    assert watcher.drain() == []
+
+    proc.kill()
+    _wait_exited(proc.pid)
+    assert select.select([watcher.fileno()], [], [], 5)[0]
+
+    assert watcher.drain() == [("vm-1", proc.pid)]
+    assert watcher.is_running("vm-1", proc.pid) is None
+    assert watcher.drain() == []
+    proc.wait()
+
+
+def test_pid_watcher_unknown_key_or_pid(spawn, watcher):
+    """Unwatched keys and mismatched PIDs are left to the caller"""
+    proc = spawn(["sleep", "30"])
+    watcher.watch("vm-1", proc.pid)
+
+    assert watcher.is_running("vm-2", proc.pid) is None
+    assert watcher.is_running("vm-1", proc.pid + 1) is None
+
+    watcher.unwatch("vm-1")
+    assert watcher.is_running("vm-1", proc.pid) is None
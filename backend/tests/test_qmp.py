@@ -0,0 +1,223 @@
+"""Tests for the QMP client and QMP-based VM shutdown"""
+import json
+import signal
+import socket
+import subprocess
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app import vm_manager as vm_manager_module
+from app.deps import vm_manager
+from app.process_utils import is_process_running, terminate_pid
+from app.qmp import QMPClient, QMPError
+
+GREETING = {"QMP": {"version": {"qemu": {"major": 8, "minor": 2, "micro": 0}}, "capabilities": []}}
+
+
+class FakeQMPServer:
+    """Throwaway AF_UNIX server speaking just enough QMP for the client
+
+    replies maps a command name to the messages sent back for it (default
+    an empty "return"), or to a callable producing them. An empty list
+    means the command is never answered.
+    """
+
+    def __init__(self, path, replies=None):
+        self.path = str(path)
+        self.replies = replies or {}
+        self.commands = []
+        self.connections = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(1)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _send(self, conn, msg):
+        conn.sendall(json.dumps(msg).encode() + b'\n')
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            with conn, conn.makefile('rb') as reader:
+                self._send(conn, GREETING)
+                for line in reader:
+                    cmd = json.loads(line)["execute"]
+                    self.commands.append(cmd)
+                    reply = self.replies.get(cmd, [{"return": {}}])
+                    if callable(reply):
+                        reply = reply()
+                    for msg in reply:
+                        self._send(conn, msg)
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._thread.join(timeout=5)
+
+
+@pytest.fixture
+def qmp_server(tmp_path):
+    """Start a FakeQMPServer on a socket in tmp_path"""
+    servers = []
+
+    def _start(replies=None):
+        server = FakeQMPServer(tmp_path / f"qmp{len(servers)}.sock", replies)
+        servers.append(server)
+        return server
+
+    yield _start
+
+    for server in servers:
+        server.close()
+
+
+# ==================== QMPClient ====================
+
+def test_capabilities_negotiated_once(qmp_server):
+    """The greeting and qmp_capabilities happen once per connection"""
+    server = qmp_server({"query-status": [{"return": {"status": "running"}}]})
+    with QMPClient(server.path, timeout=2) as client:
+        assert client.execute("query-status") == {"status": "running"}
+        assert client.execute("query-status") == {"status": "running"}
+
+    assert server.commands == ["qmp_capabilities", "query-status", "query-status"]
+    assert server.connections == 1
+
+
+def test_events_are_skipped(qmp_server):
+    """Async events arriving before the reply are ignored"""
+    server = qmp_server({"query-status": [
+        {"event": "RESUME", "timestamp": {"seconds": 0, "microseconds": 0}},
+        {"event": "POWERDOWN", "timestamp": {"seconds": 0, "microseconds": 0}},
+        {"return": {"status": "running"}},
+    ]})
+    with QMPClient(server.path, timeout=2) as client:
+        assert client.execute("query-status") == {"status": "running"}
+
+
+def test_error_reply_raises(qmp_server):
+    """An error reply raises QMPError and drops the connection"""
+    server = qmp_server({"system_powerdown": [
+        {"error": {"class": "GenericError", "desc": "guest not ready"}},
+    ]})
+    client = QMPClient(server.path, timeout=2)
+    with pytest.raises(QMPError, match="guest not ready"):
+        client.system_powerdown()
+    assert client._sock is None
+
+
+def test_timeout_closes_connection(qmp_server):
+    """A command that is never answered times out and closes the socket"""
+    server = qmp_server({"system_powerdown": []})
+    client = QMPClient(server.path, timeout=0.2)
+    with pytest.raises(QMPError, match="Timeout"):
+        client.system_powerdown()
+    assert client._sock is None
+
+    # The next command reconnects and negotiates again
+    client.execute("query-status")
+    assert server.connections == 2
+    client.close()
+
+
+def test_socket_missing(tmp_path):
+    """A missing socket surfaces as QMPError"""
+    client = QMPClient(str(tmp_path / "missing.sock"), timeout=0.2)
+    with pytest.raises(QMPError, match="not available"):
+        client.execute("query-status")
+
+
+# ==================== VMManager._powerdown / stop_vm ====================
+
+@pytest.fixture
+def qemu_stand_in():
+    """A running VM in vm_manager backed by a real sleep process"""
+    proc = subprocess.Popen(["sleep", "30"])
+    vm_id = "qmp-test-vm"
+    vm_manager.vms[vm_id] = {
+        "id": vm_id,
+        "name": "QMPTestVM",
+        "status": "running",
+        "memory": 1024,
+        "cpus": 1,
+        "disk_size": 10,
+        "disk_path": "/tmp/fake.qcow2",
+        "vnc_port": 5900,
+        "spice_port": 5800,
+        "pid": proc.pid,
+        "networks": [],
+        "boot_order": ["disk"],
+    }
+    with patch.object(vm_manager, '_save_vms'), \
+            patch.object(vm_manager, '_stop_swtpm'), \
+            patch.object(vm_manager, '_cleanup_vm_macvtaps'), \
+            patch.object(vm_manager.spice_proxy_manager, 'stop_proxy'), \
+            patch.object(vm_manager.vnc_proxy_manager, 'stop_proxy'):
+        yield vm_id, proc
+
+    vm_manager._close_qmp(vm_id)
+    vm_manager._pid_watcher.unwatch(vm_id)
+    del vm_manager.vms[vm_id]
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+
+def test_stop_vm_powers_down_over_qmp(qmp_server, qemu_stand_in):
+    """stop_vm asks for an ACPI shutdown and does not signal QEMU itself"""
+    vm_id, proc = qemu_stand_in
+
+    def guest_shuts_down():
+        proc.send_signal(signal.SIGTERM)
+        return [{"return": {}}]
+
+    server = qmp_server({"system_powerdown": guest_shuts_down})
+    vm_manager._qmp_clients[vm_id] = QMPClient(server.path, timeout=2)
+
+    with patch.object(vm_manager_module, 'terminate_pid') as mock_terminate:
+        vm = vm_manager.stop_vm(vm_id)
+
+    mock_terminate.assert_not_called()
+    assert server.commands == ["qmp_capabilities", "system_powerdown"]
+    assert vm.status == "stopped"
+    assert vm_id not in vm_manager._qmp_clients
+
+
+def test_stop_vm_falls_back_to_terminate_on_qmp_timeout(qmp_server, qemu_stand_in):
+    """A wedged monitor times out, the connection is closed and QEMU is signalled"""
+    vm_id, proc = qemu_stand_in
+    server = qmp_server({"system_powerdown": []})
+    client = QMPClient(server.path, timeout=0.2)
+    vm_manager._qmp_clients[vm_id] = client
+
+    with patch.object(vm_manager_module, 'terminate_pid', wraps=terminate_pid) as mock_terminate:
+        vm = vm_manager.stop_vm(vm_id)
+
+    mock_terminate.assert_called_once_with(proc.pid, timeout=10)
+    assert client._sock is None
+    assert vm.status == "stopped"
+    assert not is_process_running(proc.pid)
+
+
+def test_stop_vm_force_skips_powerdown(qmp_server, qemu_stand_in):
+    """force=True signals QEMU without asking the guest over QMP"""
+    vm_id, proc = qemu_stand_in
+    server = qmp_server()
+    vm_manager._qmp_clients[vm_id] = QMPClient(server.path, timeout=2)
+
+    with patch.object(vm_manager_module, 'terminate_pid', wraps=terminate_pid) as mock_terminate:
+        vm = vm_manager.stop_vm(vm_id, force=True)
+
+    mock_terminate.assert_called_once_with(proc.pid, timeout=10)
+    assert server.commands == []
+    assert vm.status == "stopped"